@@ -18,15 +18,117 @@ The code defines a `KeynoteSlidesFreezer` class with methods for processing Keyn
 The script uses the `appscript` and `AppKit` libraries to interact with Keynote on macOS. It also uses the `fitz` library for PDF manipulation.
 """
 
+from __future__ import annotations
+
+import logging
 import os
+import re
 import shutil
 from pathlib import Path
 
 import fitz
-from AppKit import NSData, NSPasteboard, NSPDFPboardType
-from appscript import app, k, mactypes
+from AppKit import (
+    NSAppleEventDescriptor,
+    NSAppleScript,
+    NSData,
+    NSPasteboard,
+    NSPDFPboardType,
+)
+from appscript import CommandError, app, k, mactypes
 import tempfile
 
+logger = logging.getLogger(__name__)
+
+# Four-char codes of the Apple Event that calls a handler of a compiled AppleScript
+AS_SUITE = int.from_bytes(b"ascr", "big")
+AS_SUBROUTINE_EVENT = int.from_bytes(b"psbr", "big")
+AS_SUBROUTINE_NAME = int.from_bytes(b"snam", "big")
+AS_DIRECT_OBJECT = int.from_bytes(b"----", "big")
+
+# Handlers for the per-slide work, compiled once and called with arguments
+APPLESCRIPT = """
+on isSafeFont(fontName, fontPrefixes)
+    set oldDelimiters to AppleScript's text item delimiters
+    set AppleScript's text item delimiters to "-"
+    set familyName to text item 1 of fontName
+    set AppleScript's text item delimiters to oldDelimiters
+    considering case
+        repeat with fontPrefix in fontPrefixes
+            if familyName starts with (contents of fontPrefix) then return true
+        end repeat
+    end considering
+    return false
+end isSafeFont
+
+on cleanDeck(docID, fontPrefixes, keepText)
+    tell application "Keynote"
+        repeat with s in (get slides of document id docID)
+            tell s
+                if title showing then
+                    if my isSafeFont(font of object text of default title item, fontPrefixes) is not keepText then
+                        set title showing to false
+                    end if
+                end if
+                if body showing then
+                    if my isSafeFont(font of object text of default body item, fontPrefixes) is not keepText then
+                        set body showing to false
+                    end if
+                end if
+                repeat with i from (count of text items) to 1 by -1
+                    set t to text item i
+                    if not locked of t then
+                        if my isSafeFont(font of object text of t, fontPrefixes) is not keepText then
+                            try
+                                delete t
+                            end try
+                        end if
+                    end if
+                end repeat
+                repeat with i from (count of shapes) to 1 by -1
+                    set t to shape i
+                    if not locked of t then
+                        if my isSafeFont(font of object text of t, fontPrefixes) is not keepText then
+                            try
+                                delete t
+                            end try
+                        end if
+                    end if
+                end repeat
+                if keepText then my wipeVectors(docID, slide number)
+            end tell
+        end repeat
+    end tell
+end cleanDeck
+
+on wipeVectors(docID, slideNumber)
+    tell application "Keynote"
+        tell slide slideNumber of document id docID
+            delete every chart
+            delete every image
+            delete every group
+            delete every line
+            delete every table
+        end tell
+    end tell
+end wipeVectors
+
+on deleteItems(docID, slideNumber, itemClass, indices)
+    tell application "Keynote"
+        tell slide slideNumber of document id docID
+            repeat with i in indices
+                try
+                    if itemClass is "shape" then
+                        delete shape (contents of i)
+                    else
+                        delete text item (contents of i)
+                    end if
+                end try
+            end repeat
+        end tell
+    end tell
+end deleteItems
+"""
+
 
 class KeynoteSlidesFreezer:
     """
@@ -35,38 +137,64 @@ class KeynoteSlidesFreezer:
     Attributes:
         __class__.timeout_short (int): The timeout value for short operations, in milliseconds.
         __class__.timeout_long (int): The timeout value for long operations, in milliseconds.
+        __class__.paste_fallback (bool): If True, PDF pages that Keynote fails to insert as images are pasted via the pasteboard instead.
         sys: An instance of the `System Events` app from the`appscript` library.
         app: An instance of the `Keynote` app from the `appscript` library.
+        pasteboard: The general `NSPasteboard`, used when pasting PDF pages.
+        script: The compiled `APPLESCRIPT` handlers, as an `NSAppleScript` instance.
         doc_path (Path): The path to the Keynote deck being processed.
         out_path (Path): The path to the output deck file. If not provided, the output file will be created in the same folder as the input file, with `-frozen` added to the base filename.
         vecdoc: A copy of the Keynote deck where vector art will be kept.
         vecdoc_path (Path): The path to the `vecdoc` in a temporary folder.
         txtdoc: A copy of the Keynote deck where text items with supported fonts will be kept, and where the PDF pages will be pasted.
         txtdoc_path (Path): The path to the `txtdoc` in a temporary folder.
-        pdf_pages_paths (List[Path]): A list of paths to the pages of the PDF version of the Keynote deck.
-        fonts_as_text (List[str]): A list of font names to keep as text items in the cleaned deck.
+        pdf_file (fitz.Document): The PDF version of the Keynote deck, open from `export_vecdoc` until `cleanup`.
+        pdf_pages_paths (list[Path]): A list of paths to the PNG images of the Keynote deck (see `export_doc_png`).
+        pdf_pages_bytes (list[bytes]): A list of single-page PDFs with the pages of the PDF version of the Keynote deck.
+        fonts_as_text (list[str]): A list of font names to keep as text items in the cleaned deck.
+        fonts_re (re.Pattern): A compiled pattern that matches font names starting with one of `fonts_as_text`.
     """
 
     timeout_short = 5000
     timeout_long = 12000
+    paste_fallback = True
 
-    def __init__(self):
+    def __init__(self, temp_dir=None):
         """
         Initializes a new KeynoteTricks instance.
+
+        Parameters:
+            temp_dir (str or Path): The folder in which the temporary folder is created. Defaults to the system temporary folder (`$TMPDIR`).
+                The copies of the deck and the exported PDF are written there. Pointing it at a RAM disk (created with `hdiutil attach -nomount ram://<sectors>` and `diskutil erasevolume`) avoids the SSD write and read-back of large decks, at the cost of RAM. Note that `/private/tmp` is not RAM-backed on macOS.
         """
         self.sys = app("System Events")
         self.app = app("Keynote")
         self.app.activate()
-        self.doc_path: Path = None
-        self.out_path: Path = None
+        # The first Apple Event sent to an app pays its launch and connection
+        # cost; send a cheap one now, so that it does not eat into the timeout
+        # of the first timed command
+        try:
+            self.app.version.get()
+            self.sys.name.get()
+        except CommandError:
+            pass
+        self.pasteboard = NSPasteboard.generalPasteboard()
+        self.script = NSAppleScript.alloc().initWithSource_(APPLESCRIPT)
+        compiled, error = self.script.compileAndReturnError_(None)
+        if not compiled:
+            raise RuntimeError(f"Cannot compile the AppleScript handlers: {error}")
+        self.doc_path: Path | None = None
+        self.out_path: Path | None = None
         self.vecdoc = None
-        self.vecdoc_path: Path = None
+        self.vecdoc_path: Path | None = None
         self.txtdoc = None
-        self.txtdoc_path: Path = None
-        self.pdf_pages_folder: Path = None
-        self.pdf_pages_paths: List[Path] = None
-        self.fonts_as_text: List[str] = None
-        self.temp_folder = tempfile.TemporaryDirectory()
+        self.txtdoc_path: Path | None = None
+        self.pdf_file: fitz.Document | None = None
+        self.pdf_pages_paths: list[Path] | None = None
+        self.pdf_pages_bytes: list[bytes] | None = None
+        self.fonts_as_text: list[str] | None = None
+        self.fonts_re: re.Pattern | None = None
+        self.temp_folder = tempfile.TemporaryDirectory(dir=temp_dir)
         self.temp_folder_path = self.temp_folder.name
 
     def _file(self, path):
@@ -122,44 +250,131 @@ class KeynoteSlidesFreezer:
         self.vecdoc = self.app.open(self._file(self.vecdoc_path))
         self.vecdoc.activate()
 
-    def safe_text_item(self, item):
-        """Returns True if the given Keynote item is a safe text item, i.e., its font is one of the supported fonts."""
-        font = item.object_text.font.get().split("-")[0]
-        return any(
-            (font.startswith(font_as_text) for font_as_text in self.fonts_as_text)
+    def safe_font(self, font):
+        """Returns True if the given font name belongs to one of the supported fonts."""
+        return bool(self.fonts_re.match(font.split("-")[0]))
+
+    def _descriptor(self, value):
+        """
+        Convert a Python value to an Apple Event descriptor.
+
+        Parameters:
+            value (bool, int, str or list): The value to convert.
+
+        Returns:
+            An `NSAppleEventDescriptor` object.
+        """
+        if isinstance(value, bool):
+            return NSAppleEventDescriptor.descriptorWithBoolean_(value)
+        if isinstance(value, int):
+            return NSAppleEventDescriptor.descriptorWithInt32_(value)
+        if isinstance(value, str):
+            return NSAppleEventDescriptor.descriptorWithString_(value)
+        desc = NSAppleEventDescriptor.listDescriptor()
+        for i, item in enumerate(value, start=1):
+            desc.insertDescriptor_atIndex_(self._descriptor(item), i)
+        return desc
+
+    def run_handler(self, name, *args):
+        """
+        Calls a handler of the compiled `APPLESCRIPT`.
+
+        Args:
+            name (str): The name of the handler.
+            *args: The arguments passed to the handler.
+
+        Returns:
+            bool: True if the handler ran without errors. Errors are logged as warnings.
+        """
+        event = NSAppleEventDescriptor.appleEventWithEventClass_eventID_targetDescriptor_returnID_transactionID_(
+            AS_SUITE,
+            AS_SUBROUTINE_EVENT,
+            NSAppleEventDescriptor.nullDescriptor(),
+            -1,
+            0,
+        )
+        event.setParamDescriptor_forKeyword_(
+            NSAppleEventDescriptor.descriptorWithString_(name.lower()),
+            AS_SUBROUTINE_NAME,
         )
+        event.setParamDescriptor_forKeyword_(self._descriptor(args), AS_DIRECT_OBJECT)
+        _, error = self.script.executeAppleEvent_error_(event, None)
+        if error is not None:
+            logger.warning("AppleScript handler %s failed: %s", name, error)
+        return error is None
 
-    def clean_items(self, slide, items, keep_text_items):
+    def delete_items(self, doc_id, slide_number, item_class, indices):
+        """
+        Deletes items from a slide with a single call of the `deleteItems` handler, which loops over the item indices inside Keynote. Items that fail to delete are skipped.
+
+        Args:
+            doc_id (str): The id of the deck.
+            slide_number (int): The number of the slide.
+            item_class (str): The AppleScript class of the items, `text item` or `shape`.
+            indices (list[int]): The 1-based indices of the items to delete, in descending order.
+
+        Returns:
+            bool: True if the handler ran without errors.
+        """
+        return self.run_handler(
+            "deleteItems", doc_id, slide_number, item_class, indices
+        )
+
+    def clean_items(self, doc_id, slide_number, slide, item_class, keep_text_items):
         """
         Deletes or hides items from the slide.
 
+        The item references, fonts and locked states are fetched with one Apple Event per attribute for the whole collection, and the filtering is done in Python.
+
         Args:
+        - doc_id: id of the Keynote deck
+        - slide_number: number of the Keynote slide
         - slide: Keynote slide
-        - items: list of Keynote slide items
+        - item_class: AppleScript class of the items to clean, `text item` or `shape`
         - keep_text_items: boolean, if True, deletes or hides vector items and text items with unsupported fonts, if False, deletes or hides text items with supported fonts.
 
         Returns:
         - None
         """
 
-        items_to_delete = []
-        for item in items:
-            item_to_delete = self.safe_text_item(item) != keep_text_items
+        items = getattr(slide, f"{item_class.replace(' ', '_')}s")
+        refs = items.get()
+        if not refs:
+            return
+        body_item = slide.default_body_item
+        title_item = slide.default_title_item
+        fonts = items.object_text.font.get()
+        locks = items.locked.get()
+
+        # Walk the items backwards, so that the indices to delete come out in
+        # descending order and deleting one does not shift the others
+        unsafe = []
+        for i in range(len(refs) - 1, -1, -1):
+            item_to_delete = self.safe_font(fonts[i]) != keep_text_items
             if item_to_delete:
-                if "default_body_item" in repr(item):
+                if refs[i] == body_item:
                     if slide.body_showing.get():
                         slide.body_showing.set(not item_to_delete)
                     item_to_delete = False
-                elif "default_title_item" in repr(item):
+                elif refs[i] == title_item:
                     if slide.title_showing.get():
                         slide.title_showing.set(not item_to_delete)
                     item_to_delete = False
             if item_to_delete:
-                items_to_delete.append(item)
-        items_to_delete.reverse()
-        for item in items_to_delete:
-            if not item.locked.get():
-                item.delete()
+                unsafe.append(i)
+        items_to_delete = [i for i in unsafe if not locks[i]]
+        if not items_to_delete:
+            return
+        if self.delete_items(
+            doc_id, slide_number, item_class, [i + 1 for i in items_to_delete]
+        ):
+            return
+        # Items are addressed by index, so only delete them one by one if the
+        # handler failed before deleting anything, or the indices have shifted
+        if len(items.get()) != len(refs):
+            return
+        for i in items_to_delete:
+            refs[i].delete()
 
     def clean_slide(self, doc, slide, keep_text_items):
         """
@@ -171,27 +386,43 @@ class KeynoteSlidesFreezer:
             - keep_text_items: boolean, if True, deletes or hides vector items and text items with unsupported fonts, if False, deletes or hides text items with supported fonts.
         """
 
-        doc.current_slide.set(slide)
-        self.clean_items(slide, slide.text_items.get(), keep_text_items)
-        self.clean_items(slide, slide.shapes.get(), keep_text_items)
-        if keep_text_items:
+        doc_id = doc.id.get()
+        slide_number = slide.slide_number.get()
+        self.clean_items(doc_id, slide_number, slide, "text item", keep_text_items)
+        self.clean_items(doc_id, slide_number, slide, "shape", keep_text_items)
+        if keep_text_items and not self.run_handler(
+            "wipeVectors", doc_id, slide_number
+        ):
             slide.charts.delete()
             slide.images.delete()
             slide.groups.delete()
             slide.lines.delete()
             slide.tables.delete()
 
+    def clean_doc(self, doc, keep_text_items):
+        """
+        Cleans text and vector items of all slides of a deck with a single call of the `cleanDeck` handler. If the handler fails, cleans the slides one by one with `clean_slide`.
+
+        Args:
+            - doc (appscript.Reference): Reference to the deck object.
+            - keep_text_items: boolean, if True, deletes or hides vector items and text items with unsupported fonts, if False, deletes or hides text items with supported fonts.
+        """
+        if self.run_handler(
+            "cleanDeck", doc.id.get(), self.fonts_as_text, keep_text_items
+        ):
+            return
+        for slide in doc.slides.get():
+            self.clean_slide(doc, slide, keep_text_items)
+
     def process_vecdoc(self):
         """
         Processes the vector-specific Keynote deck: removes text items that use supported fonts from each slide, exports the deck to PDF, splits the PDF into separate pages.
         """
         # Open the PDF version of the deck
         self.open_vecdoc()
-        self.vecdoc.activate()
 
         # Clean up each slide in the deck
-        for slide in self.vecdoc.slides.get():
-            self.clean_slide(self.vecdoc, slide, keep_text_items=False)
+        self.clean_doc(self.vecdoc, keep_text_items=False)
 
         self.export_vecdoc()
         self.split_pdf()
@@ -204,24 +435,12 @@ class KeynoteSlidesFreezer:
             None
         """
         self.open_txtdoc()
-        self.txtdoc.activate()
+        self.clean_doc(self.txtdoc, keep_text_items=True)
         for slidei, slide in enumerate(self.txtdoc.slides.get()):
-            self.clean_slide(self.txtdoc, slide, keep_text_items=True)
-
+            # The send-to-back keystroke targets the slide shown in the GUI
             self.txtdoc.current_slide.set(slide)
-            slide.activate()
-            pdf_page_path = self.pdf_pages_paths[slidei]
-
-            pdf_data = NSData.dataWithContentsOfFile_(str(pdf_page_path))
-            pasteboard = NSPasteboard.generalPasteboard()
-            pasteboard.clearContents()
-            pasteboard.setData_forType_(pdf_data, NSPDFPboardType)
-            self.sys.keystroke(
-                "v", using=[k.command_down], timeout=self.__class__.timeout_long
-            )
-            images = slide.images.get()
-            if len(images):
-                image = images[0]
+            image = self.insert_pdf_page(slide, slidei)
+            if image is not None:
                 self.txtdoc.selection.set([image])
                 self.sys.keystroke(
                     "b",
@@ -229,6 +448,52 @@ class KeynoteSlidesFreezer:
                     timeout=self.__class__.timeout_short,
                 )
 
+    def insert_pdf_page(self, slide, slidei):
+        """
+        Inserts a page of the PDF version of the deck into a slide as an image, with Keynote's `make new image` command.
+        If that fails (e.g. on older Keynote versions) and `paste_fallback` is True, pastes the page via the pasteboard.
+
+        Args:
+            slide (appscript.Reference): Reference to the slide object.
+            slidei (int): The 0-based index of the slide and of the PDF page.
+
+        Returns:
+            appscript.Reference: Reference to the inserted image, or None if no image was inserted.
+        """
+        pdf_page_bytes = self.pdf_pages_bytes[slidei]
+        pdf_page_path = Path(self.temp_folder_path, f"{slidei+1:04}.pdf")
+        pdf_page_path.write_bytes(pdf_page_bytes)
+        try:
+            return slide.make(
+                new=k.image,
+                at=slide.images.end,
+                with_properties={k.file: self._file(pdf_page_path)},
+            )
+        except CommandError:
+            if not self.__class__.paste_fallback:
+                raise
+            return self.paste_pdf_page(slide, pdf_page_bytes)
+
+    def paste_pdf_page(self, slide, pdf_page_bytes):
+        """
+        Pastes a single-page PDF into the current slide via the pasteboard and a GUI keystroke.
+
+        Args:
+            slide (appscript.Reference): Reference to the slide object, which must be the current slide.
+            pdf_page_bytes (bytes): The single-page PDF.
+
+        Returns:
+            appscript.Reference: Reference to the pasted image, or None if nothing was pasted.
+        """
+        pdf_data = NSData.dataWithBytes_length_(pdf_page_bytes, len(pdf_page_bytes))
+        self.pasteboard.clearContents()
+        self.pasteboard.setData_forType_(pdf_data, NSPDFPboardType)
+        self.sys.keystroke(
+            "v", using=[k.command_down], timeout=self.__class__.timeout_long
+        )
+        images = slide.images.get()
+        return images[0] if len(images) else None
+
     def export_doc_png(self):
         """
         Exports the deck as PNG images (not used).
@@ -244,7 +509,7 @@ class KeynoteSlidesFreezer:
 
     def export_vecdoc(self):
         """
-        Exports the deck to a PDF file.
+        Exports the deck to a PDF file, and opens it with PyMuPDF as `pdf_file`, which stays open until `cleanup`.
 
         Returns:
             None
@@ -256,38 +521,37 @@ class KeynoteSlidesFreezer:
             timeout=self.__class__.timeout_long,
             with_properties={k.PDF_image_quality: k.Best, k.skipped_slides: False},
         )
+        self.pdf_file = fitz.open(self.pdf_path)
 
-    def split_pdf(self):
+    def _pdf_page_bytes(self, i):
         """
-        Splits the exported PDF individual pages.
+        Serializes a page of the exported PDF as a single-page PDF.
+
+        Parameters:
+            i (int): The 0-based index of the page.
 
         Returns:
-            None
+            bytes: The single-page PDF.
         """
-        self.pdf_pages_folder = Path(self.temp_folder_path, self.pdf_path.stem)
-        if self.pdf_pages_folder.exists():
-            shutil.rmtree(self.pdf_pages_folder, ignore_errors=True)
-        self.pdf_pages_folder.mkdir(parents=True, exist_ok=True)
-
-        self.pdf_file = fitz.open(self.pdf_path)
-
-        # Loop over each page in the PDF and save it as a separate PDF file
-        self.pdf_pages_paths = []
-        for i in range(self.pdf_file.page_count):
-            # Create a new PDF file for the page
-            page_pdf_path = Path(self.pdf_pages_folder, f"{i+1:04}.pdf")
-            page_pdf_doc = fitz.open()
-            page_pdf_doc.insert_pdf(self.pdf_file, from_page=i, to_page=i)
-
-            # Save the new PDF file to disk
-            page_pdf_doc.save(page_pdf_path)
-            page_pdf_doc.close()
+        with fitz.open() as page_pdf_doc:
+            page_pdf_doc.insert_pdf(
+                self.pdf_file, from_page=i, to_page=i, links=False, annots=False
+            )
+            # insert_pdf only copies the objects the page uses, with their streams
+            # compressed as in the source, so garbage collection and deflating
+            # would not make the page smaller
+            return page_pdf_doc.tobytes(garbage=0, deflate=False, clean=False)
 
-            # Add the path to the page PDF file to the list of page paths
-            self.pdf_pages_paths.append(page_pdf_path)
+    def split_pdf(self):
+        """
+        Splits the exported PDF into individual single-page PDFs, kept in memory.
 
-        # Close the input PDF file
-        self.pdf_file.close()
+        Returns:
+            None
+        """
+        self.pdf_pages_bytes = [
+            self._pdf_page_bytes(i) for i in range(self.pdf_file.page_count)
+        ]
 
     def cleanup(self):
         """
@@ -295,12 +559,15 @@ class KeynoteSlidesFreezer:
         """
         self.vecdoc.close()
         self.txtdoc.close()
+        self.pdf_file.close()
+        self.pdf_file = None
+        self.pdf_pages_bytes = None
         self.doc_path = None
         self.txtdoc = None
         self.vecdoc = None
         self.fonts_as_text = None
+        self.fonts_re = None
         shutil.move(self.txtdoc_path, self.out_path)
-        shutil.rmtree(self.pdf_pages_folder)
         self.vecdoc_path.unlink()
         self.temp_folder.cleanup()
 
@@ -315,7 +582,7 @@ class KeynoteSlidesFreezer:
         -----------
         doc_path: str or Path
             The path to the input Keynote file.
-        fonts_as_text: str or List[str]
+        fonts_as_text: str or list[str]
             A list of font names to keep as text items in the cleaned deck. Defaults to `Roboto`.
         out_path: str or Path
             The path to the output Keynote.
@@ -329,6 +596,9 @@ class KeynoteSlidesFreezer:
             if isinstance(fonts_as_text, str)
             else list(fonts_as_text)
         )
+        self.fonts_re = re.compile(
+            "|".join(map(re.escape, self.fonts_as_text)) or "(?!)"
+        )
         self.doc_path = Path(doc_path).resolve()
         self.out_path = out_path or Path(
             self.doc_path.parent, f"{self.doc_path.stem}-frozen.key"
@@ -2,7 +2,6 @@
 
 """The setup script."""
 
-import re
 from pathlib import Path
 from setuptools import find_packages, setup
 
@@ -10,9 +9,14 @@ NAME = "keynote_slides_freezer"
 
 
 def get_version(*args):
-    verstrline = open(Path(NAME, "__init__.py"), "rt").read()
-    VSRE = r"^__version__ = ['\"]([^'\"]*)['\"]"
-    return mo[1] if (mo := re.search(VSRE, verstrline, re.M)) else "undefined"
+    with open(Path(NAME, "__init__.py"), "rt", encoding="utf-8") as f:
+        for verstrline in f:
+            if verstrline.startswith("__version__"):
+                return verstrline.partition("=")[2].strip().strip("'\"")
+    return "undefined"
+
+
+LONG_DESCRIPTION = Path(__file__).with_name("README.md").read_text(encoding="utf-8")
 
 
 requirements = []
@@ -39,9 +43,7 @@ setup(
     },
     install_requires=requirements,
     license="Apache Software License 2.0",
-    long_description=open(
-        Path(Path(__file__).parent, "README.md"), "r", encoding="utf-8"
-    ).read(),
+    long_description=LONG_DESCRIPTION,
     long_description_content_type="text/markdown",
     include_package_data=True,
     keywords=[